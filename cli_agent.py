@@ -2,13 +2,215 @@ import subprocess
 import json
 import platform
 import os
-import pickle
+import locale
+import re
+import shlex
+import shutil
+import functools
+import atexit
+import threading
+from collections import OrderedDict, deque
+from itertools import islice
 from datetime import datetime
-from typing import List, Dict, Any
-import boto3
+from typing import List, Dict, Any, Callable, Deque, Optional
 from strands import Agent, tool
 from safety_guardrails import SafetyGuardrails
 
+try:
+    import orjson
+except ImportError:  # optional: faster JSON for Bedrock request/response bodies
+    orjson = None
+
+# Bedrock accepts bytes bodies, so orjson's output can be passed through as-is
+_json_dumps = orjson.dumps if orjson is not None else json.dumps
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+SYSTEM_PROMPT_FILE = 'SYSTEM-PROMPT.md'
+DEFAULT_SYSTEM_PROMPT = "You are a CLI Command Agent that helps execute system commands and answer questions."
+
+
+@functools.lru_cache(maxsize=1)
+def _read_system_prompt(path: str, mtime: float) -> str:
+    """Read the system prompt file; cached per modification time."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _load_system_prompt() -> str:
+    """Load system prompt from SYSTEM-PROMPT.md file."""
+    try:
+        return _read_system_prompt(SYSTEM_PROMPT_FILE, os.path.getmtime(SYSTEM_PROMPT_FILE))
+    except FileNotFoundError:
+        return DEFAULT_SYSTEM_PROMPT
+
+
+# Process-invariant values hoisted out of the per-question hot path
+_SYSTEM = platform.system()
+_IS_WINDOWS = _SYSTEM.lower() == 'windows'
+_OS_INFO = "Windows (use cmd/powershell commands)" if _IS_WINDOWS else "Unix/Linux (use bash commands)"
+
+_EXAMPLES_WIN = """
+Examples for Windows:
+- "What files are in this directory?" -> "dir"
+- "What's my current location?" -> "cd"
+- "What processes are running?" -> "tasklist"
+- "How much disk space is available?" -> "wmic logicaldisk get size,freespace,caption"
+- "What's in this file?" -> "type filename"
+- "What's the system info?" -> "systeminfo"""
+
+_EXAMPLES_NIX = """
+Examples for Unix/Linux:
+- "What files are in this directory?" -> "ls -la"
+- "What's my current location?" -> "pwd"
+- "What processes are running?" -> "ps aux"
+- "How much disk space is available?" -> "df -h"
+- "What's in this file?" -> "cat filename"""
+
+_EXAMPLES = _EXAMPLES_WIN if _IS_WINDOWS else _EXAMPLES_NIX
+
+# Question-to-command prompt, split around the question so each call is a plain concatenation
+_PROMPT_PREFIX = f"""Convert this English question to the most appropriate CLI command for {_SYSTEM}:
+
+Question: """
+_PROMPT_SUFFIX = f"""
+
+Provide only the CLI command that would answer this question. Be specific and use commands available on {_SYSTEM}.
+If multiple commands are needed, provide the most important one.
+{_EXAMPLES}
+
+Command:"""
+
+# Keywords that suggest a task needs a multi-step plan
+_COMPLEX_RE = re.compile(r'\b(and|then|after|install|build|deploy|setup)\b', re.IGNORECASE)
+
+# One plan step per line: skips '#'/'Step' lines and bare markers, strips numbering and bullet points
+_STEP_RE = re.compile(r'^(?![ \t]*(?:#|Step|(?:\d+[.)])?[-* \t]*\r?$))[ \t]*(?:\d+[.)][ \t]*)?[-*]*[ \t]*([^\s*-][^\r\n]*?)[ \t\r]*$', re.MULTILINE)
+
+# Tokens that separate statements, so a task containing them needs several steps
+_STEP_SEPARATORS = frozenset({';', '&', '&&', '||', 'and', 'then', 'after'})
+
+# Unsuccessful interactions are written to the memory log in batches of this size
+_MEMORY_FLUSH_EVERY = 5
+
+# The memory log is rewritten with just the loaded interactions once it grows past this many lines
+_MEMORY_LOG_MAX_LINES = 1000
+
+# Max number of question -> command translations kept per agent
+_CMD_CACHE_SIZE = 128
+
+_MODEL_ID = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+_BEDROCK_BODY_TEMPLATE = {"anthropic_version": "bedrock-2023-05-31"}
+
+
+# Bedrock runtime clients by region; built under the lock because watch workers race to first use
+_BEDROCK_CLIENTS: Dict[str, Any] = {}
+_BEDROCK_LOCK = threading.Lock()
+
+
+def _get_bedrock(region: str = 'us-east-1'):
+    """Return a process-wide Bedrock runtime client for the given region."""
+    client = _BEDROCK_CLIENTS.get(region)
+    if client is not None:
+        return client
+    with _BEDROCK_LOCK:
+        client = _BEDROCK_CLIENTS.get(region)
+        if client is None:
+            # Imported here because boto3 takes a few hundred ms to import
+            import boto3
+            from botocore.config import Config
+            config = Config(max_pool_connections=32, retries={'mode': 'adaptive'})
+            # A dedicated session: boto3's default session is not thread-safe
+            client = boto3.session.Session().client('bedrock-runtime', region_name=region, config=config)
+            _BEDROCK_CLIENTS[region] = client
+    return client
+
+
+def _is_single_command(task: str) -> bool:
+    """Return True if the task reads as one shell pipeline rather than several steps."""
+    try:
+        lexer = shlex.shlex(task, posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        parts = list(lexer)
+    except ValueError:
+        return False
+    if not parts or any(part.lower() in _STEP_SEPARATORS for part in parts):
+        return False
+    # "install nodejs" is an English request, not a call to coreutils' install
+    if _COMPLEX_RE.fullmatch(parts[0]):
+        return False
+    # Keywords pass as a subcommand ("npm install") or within an argument ("install.log"),
+    # but a bare keyword further along reads as English ("yes please install everything")
+    if any(_COMPLEX_RE.fullmatch(part) for part in parts[2:]):
+        return False
+    return shutil.which(parts[0]) is not None
+
+
+# Max bytes of stdout/stderr kept per command; the rest is drained and dropped
+_OUTPUT_LIMIT = 1 << 20
+_READ_CHUNK = 64 * 1024
+_OUTPUT_ENCODING = locale.getpreferredencoding(False)
+_TRUNCATED_MARKER = "\n... [output truncated]"
+
+# Characters that need /bin/sh to interpret (operators, expansion, globbing, comments)
+_SHELL_META_RE = re.compile(r'[;|&<>$`*?()\[\]{}\\~#\r\n]')
+
+
+def _split_simple_command(command: str) -> Optional[List[str]]:
+    """Return argv for a command that needs no shell features, or None."""
+    # cmd.exe builtins (dir, type, cd, ...) can't run without the shell
+    if _IS_WINDOWS or _SHELL_META_RE.search(command):
+        return None
+    try:
+        args = shlex.split(command)
+    except ValueError:
+        return None
+    # Leading VAR=value assignments are a shell feature too
+    if not args or '=' in args[0]:
+        return None
+    return args
+
+
+def _read_capped(stream, limit: int) -> str:
+    """Read a pipe to EOF in chunks, keeping at most ``limit`` bytes."""
+    buf = bytearray()
+    truncated = False
+    with stream:
+        for chunk in iter(lambda: stream.read(_READ_CHUNK), b''):
+            room = limit - len(buf)
+            if room > 0:
+                buf += chunk[:room]
+            if len(chunk) > room:
+                truncated = True
+    text = buf.decode(_OUTPUT_ENCODING, errors='replace').replace('\r\n', '\n')
+    return text + _TRUNCATED_MARKER if truncated else text
+
+
+def _run_capped(command: str, cwd: str = None, limit: int = _OUTPUT_LIMIT) -> subprocess.CompletedProcess:
+    """Run a shell command, capturing at most ``limit`` bytes of each output stream."""
+    args = _split_simple_command(command)
+    try:
+        proc = subprocess.Popen(args if args is not None else command, shell=args is None,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd)
+    except OSError:
+        if args is None:
+            raise
+        # Not a standalone executable (e.g. a shell builtin); let the shell handle it
+        proc = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, cwd=cwd)
+    try:
+        stderr = []
+        reader = threading.Thread(target=lambda: stderr.append(_read_capped(proc.stderr, limit)),
+                                  daemon=True)
+        reader.start()
+        stdout = _read_capped(proc.stdout, limit)
+        reader.join()
+        return subprocess.CompletedProcess(command, proc.wait(), stdout, stderr[0] if stderr else '')
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+
+
 class CLIAgent(Agent):
     """Agent that can execute CLI commands and handle complex multi-step tasks."""
     
@@ -18,7 +220,7 @@ class CLIAgent(Agent):
         self.safe_mode = safe_mode
         
         # Load and display system prompt
-        system_prompt = self._load_system_prompt()
+        system_prompt = _load_system_prompt()
         print("🤖 CLI Agent System Prompt:")
         print("=" * 50)
         print(system_prompt)
@@ -33,67 +235,123 @@ class CLIAgent(Agent):
         super().__init__(
             name="CLI Command Agent",
             description="An agent that can execute any CLI command and handle complex tasks by breaking them into steps",
-            model="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+            model=_MODEL_ID,
             system_prompt=system_prompt
         )
-        self.bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
         self.session_id = session_id or f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        self.memory_file = f".cli_memory_{self.session_id}.pkl"
+        self.memory_file = f".cli_memory_{self.session_id}.jsonl"
         self.conversation_history = self._load_memory()
+        self._mem_fp = self._open_memory_log()
+        self._memory_lock = threading.Lock()
+        self._pending_memory: List[Dict[str, Any]] = []
+        atexit.register(self._save_memory)
+        self._cmd_cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
     
-    def _load_system_prompt(self) -> str:
-        """Load system prompt from SYSTEM-PROMPT.md file."""
-        try:
-            with open('SYSTEM-PROMPT.md', 'r', encoding='utf-8') as f:
-                return f.read()
-        except FileNotFoundError:
-            return "You are a CLI Command Agent that helps execute system commands and answer questions."
+    @property
+    def bedrock(self):
+        """Bedrock runtime client, created on first use and shared by all agents."""
+        return _get_bedrock()
     
-    def _load_memory(self) -> List[Dict[str, Any]]:
-        """Load conversation history from file."""
-        if os.path.exists(self.memory_file):
-            try:
-                with open(self.memory_file, 'rb') as f:
-                    return pickle.load(f)
-            except:
-                pass
-        return []
+    def _load_memory(self) -> Deque[Dict[str, Any]]:
+        """Load the last 20 interactions from the session's JSONL log."""
+        history = deque(maxlen=20)
+        line_count = 0
+        torn = False
+        try:
+            with open(self.memory_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line_count += 1
+                    # Only the last line can lack a newline: a write cut short by a crash
+                    torn = not line.endswith('\n')
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                        # Logs written before snippets were stored
+                        record.setdefault('input_snip', record['input'][:100])
+                        record.setdefault('output_snip', record['output'][:100])
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        continue  # skip a torn or foreign line, keep the rest
+                    history.append(record)
+        except (OSError, ValueError):
+            return history
+        
+        # Appending after a torn line would glue the next record onto it
+        if torn or line_count > _MEMORY_LOG_MAX_LINES:
+            self._rewrite_memory_log(history)
+        return history
     
-    def _save_memory(self):
-        """Save conversation history to file."""
+    def _rewrite_memory_log(self, history: Deque[Dict[str, Any]]):
+        """Replace the session's JSONL log with just the given interactions."""
+        tmp_file = self.memory_file + '.tmp'
         try:
-            with open(self.memory_file, 'wb') as f:
-                pickle.dump(self.conversation_history, f)
-        except:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(record) + '\n' for record in history))
+            os.replace(tmp_file, self.memory_file)
+        except Exception:
             pass
     
+    def _open_memory_log(self):
+        """Open the session's JSONL log for appending, or None if unwritable."""
+        try:
+            return open(self.memory_file, 'a', encoding='utf-8')
+        except OSError:
+            return None
+    
+    def _save_memory(self):
+        """Append pending interactions to the session's JSONL log."""
+        with self._memory_lock:
+            records, self._pending_memory = self._pending_memory, []
+            if not records or self._mem_fp is None:
+                return
+            try:
+                self._mem_fp.write(''.join(json.dumps(record) + '\n' for record in records))
+                self._mem_fp.flush()
+            except Exception:
+                pass
+    
     def _add_to_memory(self, interaction_type: str, input_data: str, output_data: str, success: bool = True):
         """Add interaction to conversation memory."""
-        self.conversation_history.append({
+        record = {
             'timestamp': datetime.now().isoformat(),
             'type': interaction_type,
             'input': input_data,
             'output': output_data,
-            'success': success
-        })
-        # Keep only last 20 interactions
-        if len(self.conversation_history) > 20:
-            self.conversation_history = self.conversation_history[-20:]
-        self._save_memory()
+            'success': success,
+            # Truncated once here so context prompts never re-slice them
+            'input_snip': input_data[:100],
+            'output_snip': output_data[:100]
+        }
+        # The deque's maxlen keeps only the last 20 interactions
+        with self._memory_lock:
+            self.conversation_history.append(record)
+            self._pending_memory.append(record)
+            pending = len(self._pending_memory)
+        # Blocked/paused/failed interactions are batched; anything successful is written right away
+        if success or pending >= _MEMORY_FLUSH_EVERY:
+            self._save_memory()
     
     def _get_context_prompt(self) -> str:
         """Generate context from recent conversation history."""
         if not self.conversation_history:
             return ""
         
-        context_lines = ["Previous conversation context:"]
-        for item in self.conversation_history[-5:]:  # Last 5 interactions
-            context_lines.append(f"- {item['type']}: {item['input'][:100]} -> {item['output'][:100]}")
+        with self._memory_lock:
+            start = max(0, len(self.conversation_history) - 5)
+            recent = list(islice(self.conversation_history, start, None))  # Last 5 interactions
         
-        return "\n".join(context_lines) + "\n\n"
-        self.session_id = session_id or f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        self.memory_file = f".cli_memory_{self.session_id}.pkl"
-        self.conversation_history = self._load_memory()
+        return "Previous conversation context:\n" + "\n".join(
+            f"- {item['type']}: {item['input_snip']} -> {item['output_snip']}" for item in recent
+        ) + "\n\n"
+    
+    def _invoke_model(self, prompt: str, max_tokens: int) -> str:
+        """Send a single-turn prompt to Bedrock and return the reply text."""
+        body = dict(_BEDROCK_BODY_TEMPLATE, max_tokens=max_tokens,
+                    messages=[{"role": "user", "content": prompt}])
+        response = self.bedrock.invoke_model(modelId=_MODEL_ID, body=_json_dumps(body))
+        result = _json_loads(response['body'].read())
+        return result['content'][0]['text']
     
     @tool
     def execute_command(self, command: str, working_directory: str = None, force: bool = False) -> Dict[str, Any]:
@@ -113,27 +371,27 @@ class CLIAgent(Agent):
         
         # Safety validation (unless forced)
         if not force:
-            validation = self.safety.validate_command(command, working_directory)
+            # One analysis covers the risk, the verdict, alternatives and backup advice
+            analysis = self.safety.analyze(command, working_directory)
             
             # Display risk assessment
-            risk_level = validation['risk_level']
+            risk_level = analysis.risk_level
             risk_icons = {'safe': '✅', 'low': '🟡', 'medium': '🟠', 'high': '🔴', 'critical': '⛔'}
-            print(f"{risk_icons.get(risk_level, '❓')} Risk Level: {risk_level.upper()} - {validation['reason']}")
+            print(f"{risk_icons.get(risk_level, '❓')} Risk Level: {risk_level.upper()} - {analysis.reason}")
             
             # Display warnings
-            for warning in validation['warnings']:
+            for warning in analysis.warnings:
                 print(f"⚠️  Warning: {warning}")
             
             # Block if not allowed
-            if not validation['allowed']:
-                error_msg = f"Command blocked: {validation['blocked_reason']}"
+            if not analysis.allowed:
+                error_msg = f"Command blocked: {analysis.blocked_reason}"
                 print(f"❌ {error_msg}")
                 
                 # Suggest alternatives
-                alternatives = self.safety.get_safe_alternatives(command)
-                if alternatives:
+                if analysis.alternatives:
                     print("💡 Suggested alternatives:")
-                    for alt in alternatives:
+                    for alt in analysis.alternatives:
                         print(f"  - {alt}")
                 
                 self._add_to_memory('command', command, error_msg, False)
@@ -148,13 +406,12 @@ class CLIAgent(Agent):
                 }
             
             # Require confirmation for risky commands
-            if validation['requires_confirmation']:
+            if analysis.requires_confirmation:
                 print(f"❓ This command requires confirmation due to {risk_level} risk level.")
                 
                 # Show backup recommendation
-                backup_rec = self.safety.create_backup_recommendation(command)
-                if backup_rec:
-                    print(f"💾 Backup recommendation: {backup_rec}")
+                if analysis.backup_recommendation:
+                    print(f"💾 Backup recommendation: {analysis.backup_recommendation}")
                 
                 print("⚠️  Command execution paused. Use force=True to override or modify the command.")
                 self._add_to_memory('command', command, "Execution paused - confirmation required", False)
@@ -170,13 +427,7 @@ class CLIAgent(Agent):
             
         try:
             print("⚙️  Executing command...")
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                cwd=working_directory
-            )
+            result = _run_capped(command, cwd=working_directory)
             
             print(f"📤 Command output:")
             if result.stdout:
@@ -219,175 +470,57 @@ class CLIAgent(Agent):
             Dictionary with the answer, command used, and execution result
         """
         print(f"🔧 Tool: answer_question(question='{question}', working_directory={working_directory})")
-        # Detect operating system
-        is_windows = platform.system().lower() == 'windows'
-        
-        if is_windows:
-            examples = """
-Examples for Windows:
-- "What files are in this directory?" -> "dir"
-- "What's my current location?" -> "cd"
-- "What processes are running?" -> "tasklist"
-- "How much disk space is available?" -> "wmic logicaldisk get size,freespace,caption"
-- "What's in this file?" -> "type filename"
-- "What's the system info?" -> "systeminfo"""
-        else:
-            examples = """
-Examples for Unix/Linux:
-- "What files are in this directory?" -> "ls -la"
-- "What's my current location?" -> "pwd"
-- "What processes are running?" -> "ps aux"
-- "How much disk space is available?" -> "df -h"
-- "What's in this file?" -> "cat filename"""
-        
-        context = self._get_context_prompt()
-        prompt = f"""{context}Convert this English question to the most appropriate CLI command for {platform.system()}:
-
-Question: {question}
-
-Provide only the CLI command that would answer this question. Be specific and use commands available on {platform.system()}.
-If multiple commands are needed, provide the most important one.
-{examples}
-
-Command:"""
-        
-        try:
-            print(f"🤔 Thinking: Converting question '{question}' to appropriate command for {platform.system()}...")
-            
-            response = self.bedrock.invoke_model(
-                modelId="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 200,
-                    "messages": [{"role": "user", "content": prompt}]
-                })
-            )
-            
-            result = json.loads(response['body'].read())
-            command = result['content'][0]['text'].strip()
-            
-            # Clean up the command (remove any extra text)
-            command_lines = command.split('\n')
-            command = command_lines[0].strip()
-            
-            print(f"💡 Selected command: {command}")
-            print(f"⚡ Executing command...")
-            
-            # Execute the command
-            exec_result = self.execute_command(command, working_directory)
-            
-            if exec_result['success']:
-                print(f"✅ Command executed successfully")
-            else:
-                print(f"❌ Command failed with return code {exec_result['return_code']}")
-                if exec_result['stderr']:
-                    print(f"Error: {exec_result['stderr']}")
-            
-            print(f"🧠 Interpreting results...")
-            
-            # Generate human-readable answer
-            context = self._get_context_prompt()
-            answer_prompt = f"""{context}Based on this command output, provide a clear English answer to the original question.
-
-Original Question: {question}
-Command Used: {command}
-Command Output: {exec_result['stdout']}
-Command Error: {exec_result['stderr']}
-
-Provide a concise, helpful answer in plain English:"""
-            
-            answer_response = self.bedrock.invoke_model(
-                modelId="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 300,
-                    "messages": [{"role": "user", "content": answer_prompt}]
-                })
-            )
-            
-            answer_result = json.loads(answer_response['body'].read())
-            answer = answer_result['content'][0]['text'].strip()
-            
-            print(f"📝 Generated answer: {answer[:100]}{'...' if len(answer) > 100 else ''}")
-            
-            # Save to memory
-            self._add_to_memory('question', question, answer, exec_result['success'])
-            
-            return {
-                "question": question,
-                "command_used": command,
-                "answer": answer,
-                "raw_output": exec_result,
-                "success": exec_result['success']
-            }
-            
-        except Exception as e:
-            error_msg = f"Sorry, I couldn't process your question: {str(e)}"
-            self._add_to_memory('question', question, error_msg, False)
-            return {
-                "question": question,
-                "command_used": "unknown",
-                "answer": error_msg,
-                "raw_output": None,
-                "success": False
-            }
+        return self._answer_impl(question, working_directory, force=False)
     
     def answer_question_with_force(self, question: str, working_directory: str = None) -> Dict[str, Any]:
         """Answer a question with force mode enabled for risky commands."""
         print(f"🔧 Tool: answer_question_with_force(question='{question}', working_directory={working_directory})")
-        is_windows = platform.system().lower() == 'windows'
+        return self._answer_impl(question, working_directory, force=True)
+    
+    def _question_to_command(self, question: str) -> str:
+        """Translate a question into a CLI command, reusing cached translations."""
+        # Questions that mention paths or files depend on context, so always ask the model
+        key = None if any(c in question for c in '/\\.') else (question.strip().lower(), _SYSTEM)
+        if key is not None:
+            with self._cache_lock:
+                command = self._cmd_cache.get(key)
+                if command is not None:
+                    self._cmd_cache.move_to_end(key)
+            if command is not None:
+                print(f"♻️  Reusing cached command for '{question}'")
+                return command
         
-        if is_windows:
-            examples = """
-Examples for Windows:
-- "What files are in this directory?" -> "dir"
-- "What's my current location?" -> "cd"
-- "What processes are running?" -> "tasklist"
-- "How much disk space is available?" -> "wmic logicaldisk get size,freespace,caption"
-- "What's in this file?" -> "type filename"
-- "What's the system info?" -> "systeminfo"""
-        else:
-            examples = """
-Examples for Unix/Linux:
-- "What files are in this directory?" -> "ls -la"
-- "What's my current location?" -> "pwd"
-- "What processes are running?" -> "ps aux"
-- "How much disk space is available?" -> "df -h"
-- "What's in this file?" -> "cat filename"""
+        prompt = self._get_context_prompt() + _PROMPT_PREFIX + question + _PROMPT_SUFFIX
         
-        context = self._get_context_prompt()
-        prompt = f"""{context}Convert this English question to the most appropriate CLI command for {platform.system()}:
-
-Question: {question}
-
-Provide only the CLI command that would answer this question. Be specific and use commands available on {platform.system()}.
-If multiple commands are needed, provide the most important one.
-{examples}
-
-Command:"""
+        print(f"🤔 Thinking: Converting question '{question}' to appropriate command for {_SYSTEM}...")
         
+        command = self._invoke_model(prompt, max_tokens=200).strip()
+        
+        # Clean up the command (remove any extra text)
+        command_lines = command.split('\n')
+        command = command_lines[0].strip()
+        
+        if key is not None and command:
+            with self._cache_lock:
+                self._cmd_cache[key] = command
+                self._cmd_cache.move_to_end(key)
+                if len(self._cmd_cache) > _CMD_CACHE_SIZE:
+                    self._cmd_cache.popitem(last=False)
+        return command
+    
+    def _answer_impl(self, question: str, working_directory: str, force: bool) -> Dict[str, Any]:
+        """Shared implementation of answer_question and answer_question_with_force."""
         try:
-            print(f"🤔 Thinking: Converting question '{question}' to appropriate command for {platform.system()}...")
-            
-            response = self.bedrock.invoke_model(
-                modelId="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 200,
-                    "messages": [{"role": "user", "content": prompt}]
-                })
-            )
-            
-            result = json.loads(response['body'].read())
-            command = result['content'][0]['text'].strip()
-            
-            command_lines = command.split('\n')
-            command = command_lines[0].strip()
+            command = self._question_to_command(question)
             
             print(f"💡 Selected command: {command}")
-            print(f"🔥 FORCE MODE: Executing command with safety bypassed...")
+            if force:
+                print(f"🔥 FORCE MODE: Executing command with safety bypassed...")
+            else:
+                print(f"⚡ Executing command...")
             
-            exec_result = self.execute_command(command, working_directory, force=True)
+            # Execute the command
+            exec_result = self.execute_command(command, working_directory, force=force)
             
             if exec_result['success']:
                 print(f"✅ Command executed successfully")
@@ -398,6 +531,7 @@ Command:"""
             
             print(f"🧠 Interpreting results...")
             
+            # Generate human-readable answer
             context = self._get_context_prompt()
             answer_prompt = f"""{context}Based on this command output, provide a clear English answer to the original question.
 
@@ -408,20 +542,11 @@ Command Error: {exec_result['stderr']}
 
 Provide a concise, helpful answer in plain English:"""
             
-            answer_response = self.bedrock.invoke_model(
-                modelId="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 300,
-                    "messages": [{"role": "user", "content": answer_prompt}]
-                })
-            )
-            
-            answer_result = json.loads(answer_response['body'].read())
-            answer = answer_result['content'][0]['text'].strip()
+            answer = self._invoke_model(answer_prompt, max_tokens=300).strip()
             
             print(f"📝 Generated answer: {answer[:100]}{'...' if len(answer) > 100 else ''}")
             
+            # Save to memory
             self._add_to_memory('question', question, answer, exec_result['success'])
             
             return {
@@ -455,43 +580,19 @@ Provide a concise, helpful answer in plain English:"""
         """
         print(f"🔧 Tool: create_task_plan(task_description='{task_description}')")
         
-        # Detect OS for appropriate commands
-        is_windows = platform.system().lower() == 'windows'
-        os_info = "Windows (use cmd/powershell commands)" if is_windows else "Unix/Linux (use bash commands)"
-        
         prompt = f"""Create executable CLI commands for this task: {task_description}
 
-Operating System: {os_info}
+Operating System: {_OS_INFO}
 
 Provide ONLY executable CLI commands, one per line. Each command should be ready to run directly.
 For Windows, use commands like: mkdir, cd, python -m venv, pip install, echo, etc.
 Do not include explanatory text, just the commands."""
         
         try:
-            response = self.bedrock.invoke_model(
-                modelId="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 1000,
-                    "messages": [{"role": "user", "content": prompt}]
-                })
-            )
-            
-            result = json.loads(response['body'].read())
-            plan_text = result['content'][0]['text']
+            plan_text = self._invoke_model(prompt, max_tokens=1000)
             
             # Extract commands from the response
-            commands = []
-            for line in plan_text.split('\n'):
-                line = line.strip()
-                if line and not line.startswith('#') and not line.startswith('Step'):
-                    # Remove numbering if present
-                    if line[0].isdigit() and '.' in line:
-                        line = line.split('.', 1)[1].strip()
-                    # Remove bullet points
-                    line = line.lstrip('-*').strip()
-                    if line:
-                        commands.append(line)
+            commands = _STEP_RE.findall(plan_text)
             
             return commands if commands else [task_description]
             
@@ -519,17 +620,7 @@ Return Code: {result.get('return_code', 0)}
 
 Provide a helpful summary that explains what the command did and what the results mean. Be concise but informative:"""
             
-            response = self.bedrock.invoke_model(
-                modelId="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 300,
-                    "messages": [{"role": "user", "content": prompt}]
-                })
-            )
-            
-            summary_result = json.loads(response['body'].read())
-            summary = summary_result['content'][0]['text'].strip()
+            summary = self._invoke_model(prompt, max_tokens=300).strip()
             
             return summary
             
@@ -540,23 +631,32 @@ Provide a helpful summary that explains what the command did and what the result
             else:
                 return f"Command '{command}' failed with return code {result.get('return_code', -1)}. Error: {result.get('stderr', 'Unknown error')[:100]}"
     
-    def execute_task(self, task: str, working_dir: str = None) -> Dict[str, Any]:
-        """Execute a task, creating a plan if it's complex."""
+    def execute_task(self, task: str, working_dir: str = None,
+                     on_plan: Optional[Callable[[List[str]], None]] = None,
+                     on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Execute a task, creating a plan if it's complex.
+        
+        For complex tasks, on_plan receives the plan before any step runs and on_result
+        receives (step number, result) as each step finishes, so callers can show progress.
+        """
         print(f"🔧 Method: execute_task(task='{task}', working_dir={working_dir})")
         
-        # Check if task seems complex
-        complex_keywords = ["and", "then", "after", "install", "build", "deploy", "setup"]
-        is_complex = any(keyword in task.lower() for keyword in complex_keywords) or len(task.split()) > 10
+        # Check if task seems complex; a keyword inside a single runnable command doesn't count
+        is_complex = len(task.split()) > 10 or (bool(_COMPLEX_RE.search(task)) and not _is_single_command(task))
         
         if is_complex:
             plan = self.create_task_plan(task)
             results = []
+            if on_plan:
+                on_plan(plan)
             
             for i, step in enumerate(plan, 1):
                 print(f"Step {i}: {step}")
                 # Execute each step as individual command
                 result = self.execute_command(step, working_dir)
                 results.append(result)
+                if on_result:
+                    on_result(i, result)
                 
                 # Stop if step failed (unless it's a non-critical step)
                 if not result['success'] and not any(word in step.lower() for word in ['create', 'mkdir', 'echo']):
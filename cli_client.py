@@ -1,19 +1,112 @@
 #!/usr/bin/env python3
 import click
 import json
-import time
 import os
-from cli_agent import CLIAgent
+import asyncio
+import functools
+import threading
+from concurrent.futures import Executor, Future
+from cli_llm_cache import SemanticCache, DEFAULT_TTL_SECONDS
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watch falls back to polling
+    Observer = None
+
+try:
+    import orjson
+except ImportError:  # optional: faster safety config encoding/decoding
+    orjson = None
+
+WATCH_DEBOUNCE_SECONDS = 0.1
+# Polling backs off from the minimum to the maximum interval while the file is unchanged
+POLL_MIN_SECONDS = 0.1
+POLL_MAX_SECONDS = 2.0
+# What _print_answer shows; raw_output (up to MiBs of stdout/stderr) is never cached
+CACHED_ANSWER_FIELDS = ('question', 'command_used', 'answer', 'success')
+
+class _DaemonThreadExecutor(Executor):
+    """Run each call on its own daemon thread so Ctrl+C never waits for an in-flight answer.
+    
+    ThreadPoolExecutor threads are joined at interpreter exit, even after shutdown(wait=False).
+    """
+    
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+        
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+def _dumps_indented(obj):
+    """Serialize obj as JSON indented by two spaces."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(obj, indent=2)
+
+def _make_agent(session, safe_mode):
+    """Create the agent; cli_agent is imported here so --help and safety skip loading strands/boto3."""
+    from cli_agent import CLIAgent
+    return CLIAgent(session, safe_mode=safe_mode)
+
+def _print_answer(result, separator=False):
+    """Print an answer_question result in one write, optionally followed by a separator rule."""
+    if result['success']:
+        out = [
+            f"❓ Question: {result['question']}",
+            f"🔧 Command used: {result['command_used']}",
+            "",
+            "="*50,
+            f"💬 Answer: {result['answer']}"
+        ]
+    else:
+        out = [f"❌ {result['answer']}"]
+    if separator:
+        out.append("\n" + "="*50)
+    click.echo('\n'.join(out))
+
+def _answer(agent, cache, question, working_dir, force_mode=False):
+    """Answer a question, consulting the response cache when --cache is on."""
+    answer = agent.answer_question_with_force if force_mode else agent.answer_question
+    # Force mode exists to run risky commands, which must never be skipped
+    if cache is None or force_mode:
+        return answer(question, working_dir)
+    
+    scope = os.path.abspath(working_dir or '.')
+    result = cache.get(question, scope)
+    if result is not None:
+        click.echo("♻️  Using cached answer")
+        return result
+    
+    result = answer(question, working_dir)
+    # Only answers from read-only commands are reused; anything else must run again
+    if result['success'] and agent.safety.assess_command_risk(result['command_used'])[0] == 'safe':
+        cache.put(question, {field: result[field] for field in CACHED_ANSWER_FIELDS}, scope)
+    return result
 
 @click.group()
 @click.option('--session', '-s', help='Session ID for conversation memory')
 @click.option('--unsafe', is_flag=True, help='Disable safety guardrails (USE WITH CAUTION)')
+@click.option('--cache', is_flag=True, help='Reuse recent answers to the same or similar read-only questions')
+@click.option('--cache-ttl', default=DEFAULT_TTL_SECONDS, show_default=True, type=float,
+              help='Seconds a cached answer stays valid')
 @click.pass_context
-def cli(ctx, session, unsafe):
+def cli(ctx, session, unsafe, cache, cache_ttl):
     """CLI client for the Strands CLI Agent that can answer questions in English."""
     ctx.ensure_object(dict)
     ctx.obj['session'] = session
     ctx.obj['safe_mode'] = not unsafe
+    ctx.obj['cache'] = SemanticCache(ttl=cache_ttl) if cache else None
+    # Built on first use and shared by everything run under this context
+    ctx.obj['agent_factory'] = functools.lru_cache(maxsize=1)(lambda: _make_agent(session, not unsafe))
     
     if unsafe:
         click.echo("⚠️  WARNING: Safety guardrails disabled. Dangerous commands will not be blocked!")
@@ -28,7 +121,7 @@ def cli(ctx, session, unsafe):
 @click.pass_context
 def execute(ctx, command, working_dir, force, raw):
     """Execute a single CLI command."""
-    agent = CLIAgent(ctx.obj['session'], safe_mode=ctx.obj['safe_mode'])
+    agent = ctx.obj['agent_factory']()
     result = agent.execute_command(command, working_dir, force=force)
     
     if result['success']:
@@ -59,34 +152,44 @@ def execute(ctx, command, working_dir, force, raw):
         if result['stderr']:
             click.echo(f"Error:\n{result['stderr']}")
 
+def _result_lines(i, res):
+    """Format the i-th step result of execute_task as output lines."""
+    if 'command' in res:
+        status = "✅" if res['success'] else "❌"
+        lines = [f"  {status} {res['command']}"]
+        if not res['success'] and res['stderr']:
+            lines.append(f"    Error: {res['stderr'][:100]}...")
+        elif res['stdout']:
+            lines.append(f"    Output: {res['stdout'][:100]}...")
+        return lines
+    return [f"  📝 {res.get('step', f'Step {i}')}: {res.get('status', 'completed')}"]
+
 @cli.command()
 @click.argument('task')
 @click.option('--working-dir', '-w', help='Working directory for the task')
 @click.pass_context
 def task(ctx, task, working_dir):
     """Execute a task (simple or complex with automatic planning)."""
-    agent = CLIAgent(ctx.obj['session'], safe_mode=ctx.obj['safe_mode'])
-    result = agent.execute_task(task, working_dir)
+    agent = ctx.obj['agent_factory']()
     
-    click.echo(f"Task Type: {result['task_type']}")
+    # Complex tasks report the plan and each step's result as they happen
+    def show_plan(plan):
+        out = ["Task Type: complex", "📋 Execution Plan:"]
+        for i, step in enumerate(plan, 1):
+            out.append(f"  {i}. {step}")
+        out.extend(["", "📊 Results:"])
+        click.echo('\n'.join(out))
     
-    if result['task_type'] == 'complex':
-        click.echo("📋 Execution Plan:")
-        for i, step in enumerate(result['plan'], 1):
-            click.echo(f"  {i}. {step}")
-        click.echo()
+    def show_result(i, res):
+        click.echo('\n'.join(_result_lines(i, res)))
     
-    click.echo("📊 Results:")
-    for i, res in enumerate(result['results'], 1):
-        if 'command' in res:
-            status = "✅" if res['success'] else "❌"
-            click.echo(f"  {status} {res['command']}")
-            if not res['success'] and res['stderr']:
-                click.echo(f"    Error: {res['stderr'][:100]}...")
-            elif res['stdout']:
-                click.echo(f"    Output: {res['stdout'][:100]}...")
-        else:
-            click.echo(f"  📝 {res.get('step', f'Step {i}')}: {res.get('status', 'completed')}")
+    result = agent.execute_task(task, working_dir, on_plan=show_plan, on_result=show_result)
+    
+    if result['task_type'] != 'complex':
+        out = [f"Task Type: {result['task_type']}", "📊 Results:"]
+        for i, res in enumerate(result['results'], 1):
+            out.extend(_result_lines(i, res))
+        click.echo('\n'.join(out))
 
 @cli.command()
 @click.argument('question', required=False)
@@ -107,24 +210,16 @@ def ask(ctx, question, working_dir, file):
         click.echo("❌ Please provide a question either as argument or via --file option")
         return
     
-    agent = CLIAgent(ctx.obj['session'], safe_mode=ctx.obj['safe_mode'])
-    result = agent.answer_question(question, working_dir)
-    
-    if result['success']:
-        click.echo(f"❓ Question: {result['question']}")
-        click.echo(f"🔧 Command used: {result['command_used']}")
-        click.echo()
-        click.echo("="*50)
-        click.echo(f"💬 Answer: {result['answer']}")
-    else:
-        click.echo(f"❌ {result['answer']}")
+    agent = ctx.obj['agent_factory']()
+    result = _answer(agent, ctx.obj['cache'], question, working_dir)
+    _print_answer(result)
 
 @cli.command()
 @click.argument('task_description')
 @click.pass_context
 def plan(ctx, task_description):
     """Create a plan for a complex task without executing it."""
-    agent = CLIAgent(ctx.obj['session'], safe_mode=ctx.obj['safe_mode'])
+    agent = ctx.obj['agent_factory']()
     steps = agent.create_task_plan(task_description)
     
     click.echo("📋 Task Plan:")
@@ -149,79 +244,152 @@ def safety(ctx, show, reset):
             "destructive_flags": ["-rf", "/s /q"],
             "protected_extensions": [".exe", ".dll"]
         }
-        with open(config_file, 'w') as f:
-            json.dump(default_config, f, indent=2)
+        with open(config_file, 'w', encoding='utf-8') as f:
+            f.write(_dumps_indented(default_config))
         click.echo("✅ Safety configuration reset to defaults")
         return
     
     if show or True:  # Default to show
         try:
-            with open(config_file, 'r') as f:
-                config = json.load(f)
+            with open(config_file, 'rb') as f:
+                data = f.read()
+            config = orjson.loads(data) if orjson is not None else json.loads(data)
             click.echo("🛡️ Current Safety Configuration:")
-            click.echo(json.dumps(config, indent=2))
+            click.echo(_dumps_indented(config))
         except FileNotFoundError:
             click.echo("❌ Safety configuration file not found")
-        except json.JSONDecodeError:
+        except ValueError:  # json.JSONDecodeError / orjson.JSONDecodeError
             click.echo("❌ Invalid safety configuration file")
 
+def _read_question(filename):
+    """Return (question, force_mode) from the text before the first === delimiter."""
+    question_lines = []
+    force_mode = False
+    
+    # Stream the file so nothing past the delimiter is read
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip().startswith('===!'):
+                force_mode = True
+                break
+            elif line.strip().startswith('==='):
+                break
+            question_lines.append(line.rstrip('\n'))
+    
+    return '\n'.join(question_lines).strip(), force_mode
+
+async def _answer_worker(agent, cache, questions, working_dir, executor):
+    """Answer queued questions, running the blocking agent calls on the given executor."""
+    loop = asyncio.get_running_loop()
+    while True:
+        question, force_mode = await questions.get()
+        try:
+            result = await loop.run_in_executor(executor, _answer, agent, cache, question, working_dir, force_mode)
+            _print_answer(result, separator=True)
+        except Exception as e:
+            click.echo(f"❌ Error answering question: {e}")
+        finally:
+            questions.task_done()
+
+async def _enqueue_question(filename, questions):
+    """Read the question at the top of the watched file and queue it for a worker."""
+    loop = asyncio.get_running_loop()
+    try:
+        question, force_mode = await loop.run_in_executor(None, _read_question, filename)
+    except Exception as e:
+        click.echo(f"❌ Error reading {filename}: {e}")
+        return
+    
+    if question:
+        force_indicator = " 🔥 FORCE MODE" if force_mode else ""
+        click.echo(f"\n📝 New question detected{force_indicator}: {question[:50]}...")
+        await questions.put((question, force_mode))
+
+async def _watch_events(filename, questions):
+    """Wait on filesystem notifications for the file and queue each change."""
+    loop = asyncio.get_running_loop()
+    target = os.path.abspath(filename)
+    changes = asyncio.Queue()
+    
+    class QuestionFileHandler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.event_type not in ('created', 'modified', 'moved'):
+                return
+            paths = (event.src_path, getattr(event, 'dest_path', '') or '')
+            if any(os.path.abspath(path) == target for path in paths if path):
+                loop.call_soon_threadsafe(changes.put_nowait, event)
+    
+    observer = Observer()
+    observer.schedule(QuestionFileHandler(), os.path.dirname(target), recursive=False)
+    observer.start()
+    try:
+        while True:
+            await changes.get()
+            # Editors often emit several events per save; treat a burst as one change
+            try:
+                while True:
+                    await asyncio.wait_for(changes.get(), WATCH_DEBOUNCE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            await _enqueue_question(filename, questions)
+    finally:
+        observer.stop()
+        observer.join()
+
+async def _watch_polling(filename, questions):
+    """Poll the file's modification time with backoff (used when watchdog is unavailable)."""
+    try:
+        last_modified = os.stat(filename).st_mtime
+    except OSError:
+        last_modified = 0
+    delay = POLL_MIN_SECONDS
+    while True:
+        # One stat() per tick covers both the existence and the mtime check
+        try:
+            st = os.stat(filename)
+        except OSError:
+            st = None
+        if st is not None and st.st_mtime > last_modified:
+            last_modified = st.st_mtime
+            delay = POLL_MIN_SECONDS
+            # An empty file has no question, so skip opening it
+            if st.st_size:
+                await _enqueue_question(filename, questions)
+        else:
+            delay = min(delay * 2, POLL_MAX_SECONDS)
+        
+        await asyncio.sleep(delay)
+
+async def _watch_async(agent, cache, filename, working_dir, workers):
+    """Watch the file and answer its questions with a pool of concurrent workers."""
+    questions = asyncio.Queue()
+    # Not the loop's default executor: asyncio.run() waits for that one to finish its calls
+    executor = _DaemonThreadExecutor()
+    tasks = [asyncio.create_task(_answer_worker(agent, cache, questions, working_dir, executor))
+             for _ in range(workers)]
+    try:
+        if Observer is not None:
+            await _watch_events(filename, questions)
+        else:
+            await _watch_polling(filename, questions)
+    finally:
+        for t in tasks:
+            t.cancel()
+
 @cli.command()
 @click.option('--working-dir', '-w', help='Working directory for commands')
+@click.option('--workers', default=1, show_default=True, type=click.IntRange(min=1),
+              help='Number of questions answered concurrently')
 @click.pass_context
-def watch(ctx, working_dir):
+def watch(ctx, working_dir, workers):
     """Watch questions.txt file for changes and process questions automatically."""
     filename = "questions.txt"
-    agent = CLIAgent(ctx.obj['session'], safe_mode=ctx.obj['safe_mode'])
-    last_modified = os.path.getmtime(filename) if os.path.exists(filename) else 0
+    agent = ctx.obj['agent_factory']()
     
     click.echo(f"👀 Watching {filename} for changes... (Press Ctrl+C to stop)")
     
     try:
-        while True:
-            if os.path.exists(filename):
-                current_modified = os.path.getmtime(filename)
-                if current_modified > last_modified:
-                    last_modified = current_modified
-                    
-                    try:
-                        with open(filename, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        
-                        # Extract question and check for force mode delimiter
-                        lines = content.split('\n')
-                        question_lines = []
-                        force_mode = False
-                        
-                        for line in lines:
-                            if line.strip().startswith('===!'):
-                                force_mode = True
-                                break
-                            elif line.strip().startswith('==='):
-                                break
-                            question_lines.append(line)
-                        
-                        question = '\n'.join(question_lines).strip()
-                        
-                        if question:
-                            force_indicator = " 🔥 FORCE MODE" if force_mode else ""
-                            click.echo(f"\n📝 New question detected{force_indicator}: {question[:50]}...")
-                            result = agent.answer_question_with_force(question, working_dir) if force_mode else agent.answer_question(question, working_dir)
-                            
-                            if result['success']:
-                                click.echo(f"❓ Question: {result['question']}")
-                                click.echo(f"🔧 Command used: {result['command_used']}")
-                                click.echo()
-                                click.echo("="*50)
-                                click.echo(f"💬 Answer: {result['answer']}")
-                            else:
-                                click.echo(f"❌ {result['answer']}")
-                            click.echo("\n" + "="*50)
-                        
-                    except Exception as e:
-                        click.echo(f"❌ Error reading {filename}: {e}")
-            
-            time.sleep(1)
-            
+        asyncio.run(_watch_async(agent, ctx.obj['cache'], filename, working_dir, workers))
     except KeyboardInterrupt:
         click.echo("\n👋 Stopped watching.")
 
@@ -0,0 +1,139 @@
+"""
+Response cache for LLM-backed answers.
+Exact repeats are keyed on a SHA-256 of the normalized question; paraphrases are matched by
+cosine similarity of sentence embeddings when sentence-transformers is installed.
+"""
+
+import hashlib
+import importlib.util
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional: faster cache file encoding/decoding
+    orjson = None
+
+DEFAULT_CACHE_FILE = Path.home() / '.cache' / 'osta' / 'llm_cache.json'
+EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+SIMILARITY_THRESHOLD = 0.92
+DEFAULT_TTL_SECONDS = 300
+MAX_ENTRIES = 512
+
+# Checked without importing: sentence-transformers pulls in torch, which is slow to load
+HAS_EMBEDDINGS = (importlib.util.find_spec('sentence_transformers') is not None
+                  and importlib.util.find_spec('numpy') is not None)
+
+class SemanticCache:
+    """Cache of answer dictionaries keyed by question, with optional paraphrase matching."""
+    
+    def __init__(self, cache_file: Path = DEFAULT_CACHE_FILE, ttl: float = DEFAULT_TTL_SECONDS,
+                 threshold: float = SIMILARITY_THRESHOLD):
+        self.cache_file = Path(cache_file)
+        self.ttl = ttl
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._model = None
+        self._last_embedding: Tuple[Optional[str], Optional[List[float]]] = (None, None)
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+    
+    @staticmethod
+    def _normalize(question: str) -> str:
+        return ' '.join(question.lower().split())
+    
+    @staticmethod
+    def _names_path(question: str) -> bool:
+        """True if the question mentions a path or file; such questions only match exactly."""
+        # Paraphrase scores can't tell /var/log from /var/lib
+        return any(c in question for c in '/\\.')
+    
+    @classmethod
+    def _key(cls, question: str, scope: str) -> str:
+        return hashlib.sha256(f"{scope}\0{cls._normalize(question)}".encode('utf-8')).hexdigest()
+    
+    def _embed(self, question: str) -> Optional[List[float]]:
+        """Return a unit-length embedding of the question, or None without sentence-transformers."""
+        if not HAS_EMBEDDINGS:
+            return None
+        text = self._normalize(question)
+        # get() followed by put() on a miss embeds the same question twice otherwise.
+        # Read the pair once: another thread may replace it between two reads.
+        last_text, last_embedding = self._last_embedding
+        if last_text == text:
+            return last_embedding
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(EMBEDDING_MODEL)
+            model = self._model
+        embedding = model.encode(text, normalize_embeddings=True).tolist()
+        self._last_embedding = (text, embedding)
+        return embedding
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load cached entries from disk, dropping any that have expired."""
+        try:
+            data = self.cache_file.read_bytes()
+            entries = orjson.loads(data) if orjson is not None else json.loads(data)
+            now = time.time()
+            return {key: entry for key, entry in entries.items() if now - entry['created'] < self.ttl}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return {}
+    
+    def _save(self):
+        """Write the cache to disk; failures only cost future hits."""
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            if orjson is not None:
+                self.cache_file.write_bytes(orjson.dumps(self._entries))
+            else:
+                self.cache_file.write_text(json.dumps(self._entries), encoding='utf-8')
+        except (OSError, TypeError):
+            pass
+    
+    def get(self, question: str, scope: str = '') -> Optional[Dict[str, Any]]:
+        """Return the cached answer for this question (or a close paraphrase) within scope."""
+        key = self._key(question, scope)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry['created'] < self.ttl:
+                return entry['result']
+            if self._names_path(question):
+                return None
+            candidates = [e for e in self._entries.values()
+                          if e['scope'] == scope and e.get('embedding') and now - e['created'] < self.ttl]
+        if not candidates:
+            return None
+        
+        embedding = self._embed(question)
+        if embedding is None:
+            return None
+        import numpy as np
+        scores = np.asarray([e['embedding'] for e in candidates]) @ np.asarray(embedding)
+        best = int(scores.argmax())
+        return candidates[best]['result'] if scores[best] >= self.threshold else None
+    
+    def put(self, question: str, result: Dict[str, Any], scope: str = ''):
+        """Store an answer for the question within scope and persist the cache."""
+        embedding = None if self._names_path(question) else self._embed(question)
+        now = time.time()
+        with self._lock:
+            self._entries = {k: e for k, e in self._entries.items() if now - e['created'] < self.ttl}
+            key = self._key(question, scope)
+            # Re-insert so a refreshed entry moves to the newest end
+            self._entries.pop(key, None)
+            self._entries[key] = {
+                'question': question,
+                'scope': scope,
+                'embedding': embedding,
+                'result': result,
+                'created': now
+            }
+            # Dicts keep insertion order, so the oldest entries are dropped first
+            while len(self._entries) > MAX_ENTRIES:
+                del self._entries[next(iter(self._entries))]
+            self._save()
@@ -4,12 +4,109 @@ Provides multiple layers of protection against harmful commands and operations.
 """
 
 import re
+import functools
 import os
 import platform
 import json
-from typing import List, Dict, Tuple, Optional
+from dataclasses import dataclass, field
+from typing import Any, List, Dict, Tuple, Optional
 from pathlib import Path
 
+try:
+    import ahocorasick
+except ImportError:  # optional: fall back to plain substring scans
+    ahocorasick = None
+
+try:
+    import orjson
+except ImportError:  # optional: faster config parsing
+    orjson = None
+
+SUSPICIOUS_PATTERNS = [
+    r'>\s*nul',  # Output redirection to null
+    r'2>&1',     # Error redirection
+    r'\|\s*del', # Piped deletion
+    r'&\s*del',  # Chained deletion
+    r'&&\s*del', # Conditional deletion
+]
+
+SAFE_ALTERNATIVES = {
+    'del': ('dir (to list files first)', 'move to recycle bin instead'),
+    'rm': ('ls -la (to list files first)', 'mv to backup location'),
+    'format': ('chkdsk (to check disk)', 'backup data first'),
+    'shutdown': ('Use GUI shutdown', 'Schedule shutdown with delay'),
+    'reg': ('Export registry backup first', 'Use Registry Editor GUI'),
+    'chmod': ('ls -la (to check current permissions)', 'Use specific permission values'),
+    'sudo': ('Use specific sudo command', 'Check if really needed')
+}
+DEFAULT_ALTERNATIVES = ('Review command carefully', 'Consider read-only alternatives')
+
+# Substrings that make a command worth backing up for
+BACKUP_PATTERNS = ('del', 'rm', 'format', 'rmdir', 'rd')
+
+# Named groups let a single match report which pattern fired
+_SUSPICIOUS_BY_GROUP = {f'p{i}': pattern for i, pattern in enumerate(SUSPICIOUS_PATTERNS)}
+_SUSPICIOUS_RE = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in _SUSPICIOUS_BY_GROUP.items()))
+
+# Shell metacharacters and path separators; a safe command free of these needs no further checks
+_FAST_PATH_BLOCKER_RE = re.compile(r'[;|&<>`/\\]|\$\(')
+
+@functools.lru_cache(maxsize=8)
+def _load_safety_config(config_file: str, mtime: float) -> Optional[Dict]:
+    """Parse a safety config file, cached per modification time. Returns None for invalid JSON.
+    
+    The returned dict is shared between SafetyGuardrails instances and must not be mutated.
+    """
+    try:
+        if orjson is not None:
+            return orjson.loads(Path(config_file).read_bytes())
+        with open(config_file, 'r') as f:
+            return json.load(f)
+    except ValueError:  # json.JSONDecodeError / orjson.JSONDecodeError
+        print(f"Warning: Invalid JSON in {config_file}, using defaults")
+        return None
+
+class _PatternScanner:
+    """Report which tagged substrings occur in a string, in a single pass when pyahocorasick is available."""
+    
+    def __init__(self, tagged_patterns: List[Tuple[str, int, str]]):
+        # (category, index, pattern) triples; index is the pattern's position within its category
+        self._patterns = [(category, index, pattern) for category, index, pattern in tagged_patterns if pattern]
+        self._automaton = None
+        if ahocorasick is not None and self._patterns:
+            automaton = ahocorasick.Automaton()
+            for category, index, pattern in self._patterns:
+                # The same text may appear in several categories
+                automaton.add_word(pattern, automaton.get(pattern, ()) + ((category, index),))
+            automaton.make_automaton()
+            self._automaton = automaton
+    
+    def scan(self, text: str) -> Dict[str, int]:
+        """Map each category found in text to the lowest index among its matching patterns."""
+        found: Dict[str, int] = {}
+        if self._automaton is not None:
+            for _, hits in self._automaton.iter(text):
+                for category, index in hits:
+                    if category not in found or index < found[category]:
+                        found[category] = index
+        else:
+            for category, index, pattern in self._patterns:
+                if category not in found and pattern in text:
+                    found[category] = index
+        return found
+
+@dataclass
+class CommandAnalysis:
+    """Risk assessment, validation outcome and advice for a single command."""
+    risk_level: str
+    reason: str
+    warnings: List[str]
+    allowed: bool = True
+    requires_confirmation: bool = False
+    blocked_reason: Optional[str] = None
+    alternatives: List[str] = field(default_factory=list)
+    backup_recommendation: Optional[str] = None
+
 class SafetyGuardrails:
     """Comprehensive safety system for CLI command execution."""
     
@@ -20,16 +117,32 @@ class SafetyGuardrails:
         
         # Load configuration
         self.protected_paths = self._get_protected_paths()
+        # Absolute, separator-terminated prefixes so '/bin' matches '/bin/ls' but not '/binary'
+        self._protected_abs = tuple(os.path.normcase(os.path.abspath(p)).rstrip(os.sep) + os.sep
+                                    for p in self.protected_paths)
         self.dangerous_commands = self._get_dangerous_commands()
-        self.protected_extensions = set(self.config.get('protected_extensions', ['.exe', '.dll', '.sys']))
-        self.safe_commands = set(self.config.get('safe_commands', []))
-        self.destructive_flags = self.config.get('destructive_flags', [])
+        # Whole-token lookups are frozensets; substring patterns stay ordered tuples for the scanner
+        self.protected_extensions = frozenset(self.config.get('protected_extensions', ['.exe', '.dll', '.sys']))
+        self.safe_commands = frozenset(self.config.get('safe_commands', []))
+        self.destructive_flags = tuple(self.config.get('destructive_flags', []))
+        self._critical_patterns = tuple(self.config.get('dangerous_commands', {}).get('critical', []))
+        
+        # Substring checks done by assess_command_risk, matched together in one scan
+        self._scanner = _PatternScanner(
+            [('critical', i, p) for i, p in enumerate(self._critical_patterns)] +
+            [('destructive_flag', i, p) for i, p in enumerate(self.destructive_flags)] +
+            [('protected_path', i, p.lower()) for i, p in enumerate(self.protected_paths)]
+        )
+        
+        # The configuration is fixed after construction, so assessments can be memoized
+        self._assess_cached = functools.lru_cache(maxsize=1024)(self._assess)
         
     def _get_protected_paths(self) -> List[str]:
         """Get list of critical system paths to protect."""
         config_paths = self.config.get('protected_paths', {})
         if self.is_windows:
-            paths = config_paths.get('windows', [])
+            # Copy so the cached config isn't extended again by the next instance
+            paths = list(config_paths.get('windows', []))
             # Add environment-based paths
             paths.extend([
                 os.environ.get('SYSTEMROOT', 'C:\\Windows'),
@@ -43,7 +156,7 @@ class SafetyGuardrails:
     def _get_dangerous_commands(self) -> Dict[str, str]:
         """Get dictionary of dangerous commands from config."""
         config_commands = self.config.get('dangerous_commands', {})
-        commands = {}
+        commands: Dict[str, str] = {}
         
         # Combine all risk levels into a single dictionary with descriptions
         for risk_level, cmd_list in config_commands.items():
@@ -60,48 +173,53 @@ class SafetyGuardrails:
             Tuple of (risk_level, reason, warnings)
             risk_level: 'safe', 'low', 'medium', 'high', 'critical'
         """
-        command = command.strip().lower()
-        warnings = []
+        risk_level, reason, warnings = self._assess_cached(command.strip().lower())
+        # Callers append to the warnings, so never hand out the cached list
+        return risk_level, reason, list(warnings)
+    
+    def _assess(self, command: str) -> Tuple[str, str, List[str]]:
+        """Assess a stripped, lower-cased command (memoized via _assess_cached)."""
+        warnings: List[str] = []
         
         # Check for dangerous command patterns
-        first_word = command.split()[0] if command.split() else ''
+        parts = command.split()
+        first_word = parts[0] if parts else ''
+        
+        # Critical patterns, destructive flags and protected paths in one pass
+        hits = self._scanner.scan(command)
         
         # Critical risk patterns from config
-        critical_commands = self.config.get('dangerous_commands', {}).get('critical', [])
-        if any(pattern in command for pattern in critical_commands):
+        if 'critical' in hits:
             return 'critical', 'Destructive system operation detected', ['SYSTEM DESTRUCTION RISK']
         
+        # Fast path for plain read-only commands such as 'ls' or 'pwd'
+        if (first_word in self.safe_commands and first_word not in self.dangerous_commands
+                and not _FAST_PATH_BLOCKER_RE.search(command)):
+            return 'safe', 'Read-only operation', []
+        
         # High risk commands
         if first_word in self.dangerous_commands:
             risk_desc = self.dangerous_commands[first_word]
             warnings.append(f'Dangerous command: {risk_desc}')
             
             # Check for additional high-risk patterns
-            if any(pattern in command for pattern in self.destructive_flags):
+            if 'destructive_flag' in hits:
                 warnings.append('Recursive/forced operation detected')
                 return 'high', f'High-risk {risk_desc} with destructive flags', warnings
             
             return 'medium', f'Potentially dangerous: {risk_desc}', warnings
         
         # Check for protected paths
-        for path in self.protected_paths:
-            if path.lower() in command:
-                warnings.append(f'Operation on protected system path: {path}')
-                return 'high', 'System directory access detected', warnings
-        
-        # Check for suspicious patterns
-        suspicious_patterns = [
-            r'>\s*nul',  # Output redirection to null
-            r'2>&1',     # Error redirection
-            r'\|\s*del', # Piped deletion
-            r'&\s*del',  # Chained deletion
-            r'&&\s*del', # Conditional deletion
-        ]
-        
-        for pattern in suspicious_patterns:
-            if re.search(pattern, command):
-                warnings.append(f'Suspicious pattern detected: {pattern}')
-                return 'medium', 'Suspicious command pattern', warnings
+        if 'protected_path' in hits:
+            path = self.protected_paths[hits['protected_path']]
+            warnings.append(f'Operation on protected system path: {path}')
+            return 'high', 'System directory access detected', warnings
+        
+        # Check for suspicious patterns (one search over all alternatives)
+        match = _SUSPICIOUS_RE.search(command)
+        if match:
+            warnings.append(f'Suspicious pattern detected: {_SUSPICIOUS_BY_GROUP[match.lastgroup]}')
+            return 'medium', 'Suspicious command pattern', warnings
         
         # Safe commands from config
         if first_word in self.safe_commands:
@@ -112,24 +230,19 @@ class SafetyGuardrails:
     def is_path_protected(self, path: str) -> bool:
         """Check if a path is in protected directories."""
         try:
-            abs_path = os.path.abspath(path)
-            for protected in self.protected_paths:
-                if abs_path.startswith(os.path.abspath(protected)):
-                    return True
-        except:
+            abs_path = os.path.normcase(os.path.abspath(path))
+            return (abs_path.rstrip(os.sep) + os.sep).startswith(self._protected_abs)
+        except (TypeError, ValueError):  # not a path, or one containing a NUL byte
             pass
         return False
     
     def _load_config(self, config_file: str) -> Dict:
         """Load safety configuration from JSON file."""
         try:
-            with open(config_file, 'r') as f:
-                return json.load(f)
+            config = _load_safety_config(config_file, os.path.getmtime(config_file))
         except FileNotFoundError:
             return self._get_default_config()
-        except json.JSONDecodeError:
-            print(f"Warning: Invalid JSON in {config_file}, using defaults")
-            return self._get_default_config()
+        return config if config is not None else self._get_default_config()
     
     def _get_default_config(self) -> Dict:
         """Get default configuration if config file is missing."""
@@ -142,68 +255,72 @@ class SafetyGuardrails:
             'protected_extensions': ['.exe', '.dll']
         }
     
-    def validate_command(self, command: str, working_dir: str = None) -> Dict[str, any]:
+    def analyze(self, command: str, working_dir: Optional[str] = None) -> CommandAnalysis:
         """
-        Validate a command before execution.
+        Assess, validate and advise on a command in one pass over its text.
         
         Returns:
-            Dictionary with validation results and recommendations
+            CommandAnalysis with the fields of validate_command plus alternatives
+            and a backup recommendation
         """
-        risk_level, reason, warnings = self.assess_command_risk(command)
-        
-        result = {
-            'allowed': True,
-            'risk_level': risk_level,
-            'reason': reason,
-            'warnings': warnings,
-            'requires_confirmation': False,
-            'blocked_reason': None
-        }
+        command_lower = command.strip().lower()
+        risk_level, reason, warnings = self._assess_cached(command_lower)
+        first_word = command_lower.split(maxsplit=1)[0] if command_lower else ''
+        
+        analysis = CommandAnalysis(
+            risk_level=risk_level,
+            reason=reason,
+            # Warnings may be appended to below, so never hand out the cached list
+            warnings=list(warnings),
+            alternatives=list(SAFE_ALTERNATIVES.get(first_word, DEFAULT_ALTERNATIVES))
+        )
+        
+        # Recommend a backup for potentially destructive commands
+        if any(pattern in command_lower for pattern in BACKUP_PATTERNS):
+            if self.is_windows:
+                analysis.backup_recommendation = "Consider creating a system restore point: 'rstrui.exe'"
+            else:
+                analysis.backup_recommendation = "Consider creating a backup: 'rsync -av /source/ /backup/'"
         
         # Block critical risk commands in safe mode
         if self.safe_mode and risk_level == 'critical':
-            result['allowed'] = False
-            result['blocked_reason'] = 'Command blocked due to critical risk level'
-            return result
+            analysis.allowed = False
+            analysis.blocked_reason = 'Command blocked due to critical risk level'
+            return analysis
         
         # Require confirmation for high/medium risk commands
         if risk_level in ['high', 'medium']:
-            result['requires_confirmation'] = True
+            analysis.requires_confirmation = True
         
         # Additional validation for working directory
         if working_dir and self.is_path_protected(working_dir):
-            result['warnings'].append(f'Working directory is in protected system path: {working_dir}')
+            analysis.warnings.append(f'Working directory is in protected system path: {working_dir}')
             if self.safe_mode:
-                result['requires_confirmation'] = True
+                analysis.requires_confirmation = True
         
-        return result
+        return analysis
     
-    def get_safe_alternatives(self, command: str) -> List[str]:
-        """Suggest safer alternatives for dangerous commands."""
-        command_lower = command.lower().strip()
-        first_word = command_lower.split()[0] if command_lower.split() else ''
-        
-        alternatives = {
-            'del': ['dir (to list files first)', 'move to recycle bin instead'],
-            'rm': ['ls -la (to list files first)', 'mv to backup location'],
-            'format': ['chkdsk (to check disk)', 'backup data first'],
-            'shutdown': ['Use GUI shutdown', 'Schedule shutdown with delay'],
-            'reg': ['Export registry backup first', 'Use Registry Editor GUI'],
-            'chmod': ['ls -la (to check current permissions)', 'Use specific permission values'],
-            'sudo': ['Use specific sudo command', 'Check if really needed']
-        }
+    def validate_command(self, command: str, working_dir: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Validate a command before execution (see analyze).
         
-        return alternatives.get(first_word, ['Review command carefully', 'Consider read-only alternatives'])
+        Returns:
+            Dictionary with validation results and recommendations
+        """
+        analysis = self.analyze(command, working_dir)
+        return {
+            'allowed': analysis.allowed,
+            'risk_level': analysis.risk_level,
+            'reason': analysis.reason,
+            'warnings': analysis.warnings,
+            'requires_confirmation': analysis.requires_confirmation,
+            'blocked_reason': analysis.blocked_reason
+        }
+    
+    def get_safe_alternatives(self, command: str) -> List[str]:
+        """Suggest safer alternatives for dangerous commands (see analyze)."""
+        return self.analyze(command).alternatives
     
     def create_backup_recommendation(self, command: str) -> Optional[str]:
-        """Recommend backup strategy for potentially destructive commands."""
-        destructive_patterns = ['del', 'rm', 'format', 'rmdir', 'rd']
-        
-        for pattern in destructive_patterns:
-            if pattern in command.lower():
-                if self.is_windows:
-                    return "Consider creating a system restore point: 'rstrui.exe'"
-                else:
-                    return "Consider creating a backup: 'rsync -av /source/ /backup/'"
-        
-        return None
\ No newline at end of file
+        """Recommend backup strategy for potentially destructive commands (see analyze)."""
+        return self.analyze(command).backup_recommendation
\ No newline at end of file
@@ -0,0 +1,91 @@
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+
+HAS_STRANDS = importlib.util.find_spec('strands') is not None
+
+if HAS_STRANDS:
+    from cli_agent import CLIAgent, _MEMORY_LOG_MAX_LINES, _STEP_RE, _is_single_command
+
+
+def _record(n):
+    return json.dumps({'timestamp': '', 'type': 'question', 'input': f'q{n}', 'output': f'a{n}', 'success': True})
+
+
+@unittest.skipUnless(HAS_STRANDS, 'strands-agents is not installed')
+class StepParsingTest(unittest.TestCase):
+    def test_numbering_and_bullets_are_stripped(self):
+        plan = "1. pwd\n - ls -la\n* df -h\n2) whoami  \r\n"
+        self.assertEqual(_STEP_RE.findall(plan), ['pwd', 'ls -la', 'df -h', 'whoami'])
+
+    def test_indented_comments_and_step_headers_are_skipped(self):
+        plan = "  # note\nls\n  Step 1: make a folder\n\tStep 2\n\t# another note\npwd"
+        self.assertEqual(_STEP_RE.findall(plan), ['ls', 'pwd'])
+
+    def test_bare_list_markers_are_skipped(self):
+        self.assertEqual(_STEP_RE.findall("1."), [])
+        plan = "1.\nls\n2)\n3. -\r\n---\n* \npwd"
+        self.assertEqual(_STEP_RE.findall(plan), ['ls', 'pwd'])
+
+
+
+@unittest.skipUnless(HAS_STRANDS, 'strands-agents is not installed')
+class TaskRoutingTest(unittest.TestCase):
+    def route(self, task):
+        """Return the task type execute_task picks, without planning or running anything."""
+        agent = CLIAgent.__new__(CLIAgent)
+        agent.create_task_plan = lambda description: []
+        agent.execute_command = lambda command, working_dir=None: {'success': True}
+        return agent.execute_task(task)['task_type']
+
+    def test_keyword_inside_a_command_runs_directly(self):
+        self.assertTrue(_is_single_command('cat install.log | grep error'))
+        self.assertEqual(self.route('cat install.log | grep error'), 'simple')
+
+    def test_sentence_starting_with_a_binary_is_planned(self):
+        self.assertFalse(_is_single_command('yes please install everything'))
+        self.assertEqual(self.route('yes please install everything'), 'complex')
+
+    def test_long_tasks_are_always_planned(self):
+        for task in ('find all the python files in this project that are larger than one megabyte',
+                     'make a backup copy of my documents folder in the home directory today'):
+            self.assertEqual(self.route(task), 'complex')
+
+
+
+@unittest.skipUnless(HAS_STRANDS, 'strands-agents is not installed')
+class MemoryLogTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.agent = CLIAgent.__new__(CLIAgent)
+        self.agent.memory_file = os.path.join(tmp.name, 'memory.jsonl')
+
+    def write(self, text):
+        with open(self.agent.memory_file, 'a', encoding='utf-8') as f:
+            f.write(text)
+
+    def inputs(self):
+        return [record['input'] for record in self.agent._load_memory()]
+
+    def test_bad_lines_are_skipped(self):
+        self.write(_record(1) + '\n' + _record(2)[:20] + _record(3) + '\n' + _record(4) + '\n')
+        self.assertEqual(self.inputs(), ['q1', 'q4'])
+
+    def test_torn_last_line_is_repaired_before_appending(self):
+        self.write(_record(1) + '\n' + _record(2)[:20])
+        self.assertEqual(self.inputs(), ['q1'])
+        self.write(_record(3) + '\n')
+        self.assertEqual(self.inputs(), ['q1', 'q3'])
+
+    def test_long_log_is_compacted(self):
+        self.write(''.join(_record(n) + '\n' for n in range(_MEMORY_LOG_MAX_LINES + 1)))
+        self.assertEqual(len(self.inputs()), 20)
+        with open(self.agent.memory_file, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import importlib.util
+import tempfile
+import unittest
+from pathlib import Path
+
+from cli_llm_cache import SemanticCache
+
+HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+
+
+class SemanticCacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache = SemanticCache(cache_file=Path(tmp.name) / 'cache.json')
+        # Every question embeds identically, so any paraphrase lookup would hit
+        self.cache._embed = lambda question: [1.0, 0.0]
+
+    def test_exact_repeat_hits(self):
+        self.cache.put('How big is /var/log', {'answer': 'log'})
+        self.assertEqual(self.cache.get('how  big is /var/log'), {'answer': 'log'})
+
+    def test_questions_naming_paths_only_match_exactly(self):
+        self.cache.put('how big is /var/log', {'answer': 'log'})
+        self.assertIsNone(self.cache.get('how big is /var/lib'))
+        self.assertIsNone(self.cache.get('how big is the log folder'))
+
+    @unittest.skipUnless(HAS_NUMPY, 'numpy is not installed')
+    def test_paraphrase_hits_within_scope(self):
+        self.cache.put('how much disk space is free', {'answer': 'df'}, scope='/tmp')
+        self.assertEqual(self.cache.get('how much free disk space', scope='/tmp'), {'answer': 'df'})
+        self.assertIsNone(self.cache.get('how much free disk space', scope='/home'))
+
+
+if __name__ == '__main__':
+    unittest.main()